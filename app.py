@@ -16,13 +16,26 @@
 # ------------------------------------------------------------------------------
 # 1. IMPORT LIBRARIES
 # ------------------------------------------------------------------------------
-from flask import Flask, render_template, request, make_response
+from flask import Flask, Response, render_template, request, stream_with_context
 import pandas as pd
+import numpy as np
+import orjson
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 from faker import Faker
-import random
+from faker.providers import BaseProvider
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import accumulate
+from numbers import Real
 import io
+import multiprocessing
+import os
+import threading
 import json
-import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
 
 # ------------------------------------------------------------------------------
 # 2. INITIALIZE FLASK APP AND FAKER
@@ -30,75 +43,423 @@ import xml.etree.ElementTree as ET
 app = Flask(__name__)
 fake = Faker()
 
+# NumPy Generator (PCG64) used for all bulk numeric and categorical draws
+rng = np.random.default_rng()
+
+# Faker's random_element rebuilds the choice list and weight distribution of
+# its OrderedDict word lists on every call, which dominates the cost of
+# columns like first/last names. Cache both on the OrderedDict itself and
+# sample with the generator's own `random` so seeding keeps working. Only
+# weighted draws from OrderedDicts of numeric weights take this path; some
+# Faker OrderedDicts hold other values (e.g. CreditCard objects, strings),
+# and those, like every other call, go to Faker's own implementation.
+_faker_random_element = BaseProvider.random_element
+
+def fast_random_element(self, elements=('a', 'b', 'c')):
+    if not (self.__use_weighting__ and isinstance(elements, OrderedDict)):
+        return _faker_random_element(self, elements)
+    cached = getattr(elements, '_cached_choice_list', None)
+    if cached is None:
+        # False marks an OrderedDict whose values aren't numeric weights
+        cached = False
+        if all(isinstance(weight, Real) for weight in elements.values()):
+            cached = (tuple(elements.keys()), list(accumulate(elements.values())))
+        elements._cached_choice_list = cached
+    if cached is False:
+        return _faker_random_element(self, elements)
+    choices, cum_weights = cached
+    return self.generator.random.choices(choices, cum_weights=cum_weights)[0]
+
+BaseProvider.random_element = fast_random_element
+
 # ------------------------------------------------------------------------------
 # 3. MODULAR DATA GENERATION LOGIC
 # ------------------------------------------------------------------------------
 
-# This registry contains a function for every possible column in the UI.
+def faker_column(method):
+    """
+    Wraps a scalar Faker method into a bulk generator returning `n` values.
+    """
+    return lambda n: [method() for _ in range(n)]
+
+def faker_pool_column(method, pool_name):
+    """
+    Bulk generator for Faker methods that just pick one element from a word
+    pool on their provider (e.g. `first_name` from `first_names`). The whole
+    column is sampled from that pool with NumPy in one call, honouring the
+    pool's weights the same way Faker does, and returned as a Categorical.
+    """
+    provider = method.__self__
+    pool = getattr(provider, pool_name)
+    if isinstance(pool, OrderedDict):
+        choices = np.array(list(pool.keys()), dtype=object)
+        weights = None
+        if provider.__use_weighting__:
+            weights = np.fromiter(pool.values(), dtype=np.float64)
+            weights /= weights.sum()
+    else:
+        choices = np.array(pool, dtype=object)
+        weights = None
+    pool_codes, categories = pd.factorize(choices)
+    dtype = pd.CategoricalDtype(categories)
+    return lambda n: pd.Categorical.from_codes(pool_codes[rng.choice(len(pool_codes), size=n, p=weights)], dtype=dtype)
+
+def address_column(n):
+    """
+    Single-line addresses composed from their parts, which skips Faker's
+    multi-line address template and the newline replacement per row.
+    """
+    street_address, city, state_abbr, postcode = fake.street_address, fake.city, fake.state_abbr, fake.postcode
+    return [f'{street_address()}, {city()}, {state_abbr()} {postcode()}' for _ in range(n)]
+
+_HEX_DIGITS = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+# Positions of the 32 hex digits within the 36-character UUID string
+_UUID_HEX_POSITIONS = [i for i in range(36) if i not in (8, 13, 18, 23)]
+
+def uuid4_column(n):
+    """
+    Version 4 UUID strings, like `fake.uuid4()`, built from one batch of OS
+    randomness and hex-formatted with NumPy instead of per-row uuid calls.
+    """
+    raw = np.frombuffer(os.urandom(16 * n), dtype=np.uint8).reshape(n, 16).copy()
+    raw[:, 6] = raw[:, 6] & 0x0F | 0x40  # version 4
+    raw[:, 8] = raw[:, 8] & 0x3F | 0x80  # RFC 4122 variant
+    digits = np.empty((n, 32), dtype=np.uint8)
+    digits[:, 0::2] = _HEX_DIGITS[raw >> 4]
+    digits[:, 1::2] = _HEX_DIGITS[raw & 0x0F]
+    chars = np.full((n, 36), ord('-'), dtype=np.uint8)
+    chars[:, _UUID_HEX_POSITIONS] = digits
+    return chars.view('S36').ravel().astype(str)
+
+def salary_column(n):
+    values = rng.uniform(40000, 150000, n)
+    # Round in place rather than allocating a second array
+    return np.round(values, 2, out=values)
+
+def date_column(start, end):
+    """
+    Bulk generator of ISO dates drawn uniformly between today + `start` and
+    today + `end` (pandas DateOffsets), computed as NumPy day offsets instead
+    of one Faker call per row.
+    """
+    def generate(n):
+        today = pd.Timestamp.today().normalize()
+        first_day = np.datetime64((today + start).date(), 'D')
+        last_day = np.datetime64((today + end).date(), 'D')
+        days = rng.integers(0, (last_day - first_day).astype(np.int64) + 1, n)
+        return np.datetime_as_string(first_day + days, unit='D')
+    return generate
+
+def timestamp_column(n):
+    """
+    ISO 8601 timestamps between the UNIX epoch and now, like `fake.iso8601()`.
+    """
+    now = np.datetime64('now', 'us').astype(np.int64)
+    micros = rng.integers(0, now + 1, n, dtype=np.int64)
+    return np.datetime_as_string(micros.astype('datetime64[us]'), unit='us')
+
+# Fixed choice lists, built once instead of on every generator call.
+_DEPARTMENTS = ('Engineering', 'Sales', 'Marketing', 'HR', 'Finance', 'Operations')
+_DEPARTMENT_DTYPE = pd.CategoricalDtype(_DEPARTMENTS)
+
+# This registry contains a bulk generator for every possible column in the UI.
+# Each generator takes the number of rows `n` and returns all values for that
+# column in one call: numeric, categorical and word-pool columns are drawn
+# with NumPy, while other Faker columns fall back to calling Faker per row.
+# Low-cardinality string columns are returned as Categoricals, which keeps
+# each chunk small and lets pandas skip type inference.
 COLUMN_GENERATORS = {
     # Personal Info
-    'firstName': lambda: fake.first_name(),
-    'lastName': lambda: fake.last_name(),
-    'email': lambda: fake.email(),
-    'phone': lambda: fake.phone_number(),
-    'dateOfBirth': lambda: fake.date_of_birth(minimum_age=18, maximum_age=70).isoformat(),
-    'address': lambda: fake.address().replace('\n', ', '),
+    'firstName': faker_pool_column(fake.first_name, 'first_names'),
+    'lastName': faker_pool_column(fake.last_name, 'last_names'),
+    'email': faker_column(fake.email),
+    'phone': faker_column(fake.phone_number),
+    'dateOfBirth': date_column(pd.DateOffset(years=-71, days=1), pd.DateOffset(years=-18)),
+    'address': address_column,
 
     # Business Data
-    'companyName': lambda: fake.company(),
-    'jobTitle': lambda: fake.job(),
-    'department': lambda: random.choice(['Engineering', 'Sales', 'Marketing', 'HR', 'Finance', 'Operations']),
-    'salary': lambda: round(random.uniform(40000, 150000), 2),
-    'startDate': lambda: fake.date_between(start_date='-10y', end_date='today').isoformat(),
+    'companyName': faker_column(fake.company),
+    'jobTitle': faker_pool_column(fake.job, 'jobs'),
+    'department': lambda n: pd.Categorical.from_codes(rng.integers(0, len(_DEPARTMENTS), n), dtype=_DEPARTMENT_DTYPE),
+    'salary': salary_column,
+    'startDate': date_column(pd.DateOffset(years=-10), pd.DateOffset(days=0)),
 
     # Technical Data
-    'ipAddress': lambda: fake.ipv4(),
-    'userAgent': lambda: fake.user_agent(),
-    'apiKey': lambda: fake.uuid4(),
-    'uuid': lambda: fake.uuid4(),
-    'timestamp': lambda: fake.iso8601(),
+    'ipAddress': faker_column(fake.ipv4),
+    'userAgent': faker_column(fake.user_agent),
+    'apiKey': uuid4_column,
+    'uuid': uuid4_column,
+    'timestamp': timestamp_column,
 }
 
-def generate_custom_data(num_records, selected_columns):
+def resolve_generators(selected_columns):
+    """
+    Looks up the generator for each selected column once, skipping unknown columns.
+    """
+    return [(col_name, COLUMN_GENERATORS[col_name])
+            for col_name in selected_columns if col_name in COLUMN_GENERATORS]
+
+def generate_custom_data(num_records, selected_columns, generators=None):
     """
     Generates a DataFrame with user-selected columns.
     """
-    records = []
-    for _ in range(num_records):
-        record = {}
-        for col_name in selected_columns:
-            if col_name in COLUMN_GENERATORS:
-                record[col_name] = COLUMN_GENERATORS[col_name]()
-        records.append(record)
-    
-    # Ensure DataFrame columns are in the user-selected order
-    return pd.DataFrame(records, columns=selected_columns)
+    if generators is None:
+        generators = resolve_generators(selected_columns)
+
+    # Generate each column in bulk and assemble the DataFrame from the columns
+    data = {col_name: generate(num_records) for col_name, generate in generators}
+
+    # Ensure DataFrame columns are in the user-selected order, with
+    # `num_records` rows even if no selected column has a generator
+    return pd.DataFrame(data, columns=selected_columns, index=pd.RangeIndex(num_records), copy=False)
+
+# Data is generated and streamed in batches of this many rows, so peak memory
+# stays bounded no matter how many records are requested.
+CHUNK_SIZE = 10000
+
+def seed_worker():
+    """
+    Gives each worker process its own Faker and NumPy seeds from OS entropy,
+    so no two workers generate identical chunks.
+    """
+    global rng
+    fake.seed_instance(int.from_bytes(os.urandom(8), 'little'))
+    rng = np.random.default_rng()
+
+# Chunks of larger requests are generated in parallel worker processes. Only
+# the function and column names are sent to the workers, so the generator
+# lambdas never need to be pickled. Workers are spawned rather than forked:
+# Waitress serves requests from several threads, and forking a threaded
+# process can hand the child a lock another thread was holding.
+# The pool is sized by the CPUs this process may run on, which respects
+# container CPU limits. At most a small, fixed number of finished or running
+# chunks is held per request, so memory stays bounded on large hosts too.
+if hasattr(os, 'sched_getaffinity'):
+    MAX_WORKERS = len(os.sched_getaffinity(0))
+else:
+    MAX_WORKERS = os.cpu_count() or 1
+MAX_PENDING_CHUNKS = min(MAX_WORKERS + 1, 8)
+
+def new_executor():
+    return ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=seed_worker)
+
+# The pool is created on first use in the process serving requests, so
+# importing app (as every spawned worker does) doesn't build one.
+executor = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    global executor
+    with _executor_lock:
+        if executor is None:
+            executor = new_executor()
+        return executor
+
+def discard_executor(broken):
+    """
+    Drops `broken` once it can no longer be used, e.g. after one of its
+    workers was killed by the OOM killer; the next request creates a new pool.
+    """
+    global executor
+    with _executor_lock:
+        if executor is broken:
+            executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+def iter_pool_chunks(sizes, selected_columns):
+    """
+    Yields chunks generated by the worker pool, in order, taking their sizes
+    from the front of `sizes`. If the pool breaks, it is discarded and the
+    sizes of the chunks that were not yielded are put back into `sizes`.
+    """
+    pool = get_executor()
+    pending = deque()
+    try:
+        # Keep a bounded number of chunks in flight and yield them in order
+        while sizes or pending:
+            while sizes and len(pending) < MAX_PENDING_CHUNKS:
+                pending.append((sizes[0], pool.submit(generate_custom_data, sizes[0], selected_columns)))
+                sizes.popleft()
+            df = pending[0][1].result()
+            pending.popleft()
+            yield df
+    except BrokenProcessPool:
+        discard_executor(pool)
+        sizes.extendleft(reversed([size for size, _ in pending]))
+        pending.clear()
+    finally:
+        # Drop queued work if the client disconnects mid-download
+        for _, future in pending:
+            future.cancel()
+
+def iter_custom_data(num_records, selected_columns, chunk_size=CHUNK_SIZE):
+    """
+    Yields DataFrames of at most `chunk_size` rows, `num_records` rows in total.
+    Chunks are generated lazily while the response streams, so an exception
+    raised for any chunk after the first truncates the download.
+    """
+    sizes = deque(min(chunk_size, num_records - start) for start in range(0, num_records, chunk_size))
+    # With a single CPU the pool only adds overhead, so it is never used
+    if MAX_WORKERS > 1 and len(sizes) > 1:
+        yield from iter_pool_chunks(sizes, selected_columns)
+
+    # Whatever the pool didn't generate (everything, if it wasn't used or broke)
+    # is generated here, with the generators resolved once for the request.
+    # Pool workers can't be sent the generator lambdas, so they resolve them
+    # again for every chunk they generate.
+    generators = resolve_generators(selected_columns)
+    while sizes:
+        yield generate_custom_data(sizes.popleft(), selected_columns, generators)
 
 # ------------------------------------------------------------------------------
 # 4. DATA FORMATTING HELPERS
 # ------------------------------------------------------------------------------
 
 def to_json(df):
-    return df.to_json(orient='records', indent=4)
+    """Serializes rows as JSON objects, one per line, without the enclosing array."""
+    # to_dict() only warns and drops repeated columns, so refuse them here
+    if not df.columns.is_unique:
+        raise ValueError("DataFrame columns must be unique for JSON output.")
+    dumps = orjson.dumps
+    return b',\n'.join([dumps(record, option=orjson.OPT_SERIALIZE_NUMPY) for record in df.to_dict(orient='records')])
 
 def to_xml(df):
-    root = ET.Element("data")
-    for _, row in df.iterrows():
-        record_elem = ET.SubElement(root, "record")
-        for col, val in row.items():
-            child = ET.SubElement(record_elem, str(col))
-            child.text = str(val)
-    return ET.tostring(root, encoding='unicode')
+    """Serializes rows as <record> elements, without the enclosing <data> root."""
+    columns = [str(col) for col in df.columns]
+    parts = []
+    append = parts.append
+    for row in df.itertuples(index=False, name=None):
+        append('<record>')
+        for col, val in zip(columns, row):
+            append(f'<{col}>{escape(str(val))}</{col}>')
+        append('</record>')
+    return ''.join(parts)
+
+SQL_TABLE_NAME = "generated_data"
+
+def sql_create_table(columns):
+    return f"CREATE TABLE {SQL_TABLE_NAME} ({', '.join([f'{col} TEXT' for col in columns])});"
 
 def to_sql(df):
-    table_name = "generated_data"
-    sql_statements = [f"CREATE TABLE {table_name} ({', '.join([f'{col} TEXT' for col in df.columns])});"]
-    for _, row in df.iterrows():
-        cols = ', '.join(row.index)
-        vals = ', '.join(["'" + str(v).replace("'", "''") + "'" for v in row.values])
-        sql_statements.append(f"INSERT INTO {table_name} ({cols}) VALUES ({vals});")
+    """Serializes rows as INSERT statements, one per line."""
+    sql_statements = []
+    prefix = f"INSERT INTO {SQL_TABLE_NAME} ({', '.join(df.columns)}) VALUES ("
+    # Bind hot names locally for the cell loop
+    append, _str, replace = sql_statements.append, str, str.replace
+    for row in df.itertuples(index=False, name=None):
+        vals = "', '".join([replace(_str(v), "'", "''") for v in row])
+        append(f"{prefix}'{vals}');")
     return "\n".join(sql_statements)
 
+# Each stream_* function takes an iterable of DataFrame chunks and yields the
+# output file piece by piece, adding any header or framing around the rows.
+# The first piece always holds the first chunk's rows, so serializing it
+# also generates and serializes that chunk.
+
+def stream_json(frames):
+    separator = b'[\n'
+    for df in frames:
+        yield separator + to_json(df)
+        separator = b',\n'
+    yield b'\n]' if separator == b',\n' else b'[]'
+
+def stream_xml(frames):
+    opening = '<data>'
+    for df in frames:
+        yield opening + to_xml(df)
+        opening = ''
+    yield opening + '</data>'
+
+def stream_sql(frames):
+    first = True
+    for df in frames:
+        if first:
+            yield sql_create_table(df.columns) + '\n' + to_sql(df)
+            first = False
+        else:
+            yield '\n' + to_sql(df)
+
+def prepend(first, rest):
+    """
+    Yields `first` and then the items of `rest`; unlike itertools.chain,
+    closing it also closes `rest`.
+    """
+    yield first
+    yield from rest
+
+class ChunkSink(io.RawIOBase):
+    """
+    Write-only file object that collects what a binary writer emits, so it
+    can be handed out with drain() after every chunk instead of buffering
+    the whole file.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def stream_arrow(frames, open_writer):
+    """
+    Streams chunks through an Arrow table writer created from the schema of
+    the first chunk by `open_writer(sink, schema)`.
+    """
+    sink = ChunkSink()
+    writer = None
+    for df in frames:
+        # Write Categoricals as plain strings: as Arrow dictionaries they would
+        # carry their whole word pool into every file, even for a few rows
+        categorical = [col for col, dtype in df.dtypes.items() if isinstance(dtype, pd.CategoricalDtype)]
+        if categorical:
+            df = df.astype(dict.fromkeys(categorical, object))
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if writer is None:
+            writer = open_writer(sink, table.schema)
+        writer.write_table(table)
+        yield sink.drain()
+    if writer is not None:
+        writer.close()
+    yield sink.drain()
+
+def stream_csv(frames):
+    # PyArrow's multithreaded C++ CSV writer, header written with the first chunk
+    return stream_arrow(frames, pacsv.CSVWriter)
+
+def stream_parquet(frames):
+    # Every chunk becomes one Parquet row group
+    return stream_arrow(frames, lambda sink, schema: pq.ParquetWriter(sink, schema, compression='snappy'))
+
+def stream_feather(frames):
+    # Feather V2 is the Arrow IPC file format
+    options = pa.ipc.IpcWriteOptions(compression='lz4')
+    return stream_arrow(frames, lambda sink, schema: pa.ipc.new_file(sink, schema, options=options))
+
+# Maps each output format to its streaming writer, mimetype and filename.
+OUTPUT_FORMATS = {
+    'csv': (stream_csv, 'text/csv', 'custom_data.csv'),
+    'json': (stream_json, 'application/json', 'custom_data.json'),
+    'xml': (stream_xml, 'application/xml', 'custom_data.xml'),
+    'sql': (stream_sql, 'application/sql', 'custom_data.sql'),
+    'parquet': (stream_parquet, 'application/octet-stream', 'custom_data.parquet'),
+    'feather': (stream_feather, 'application/octet-stream', 'custom_data.feather'),
+}
+
 
 # ------------------------------------------------------------------------------
 # 5. FLASK ROUTES
@@ -119,7 +480,8 @@ def generate_and_download():
         # Get form data from the advanced UI
         num_records = int(request.form.get('recordCount', 1000))
         output_format = request.form.get('outputFormat', 'csv')
-        selected_columns = request.form.getlist('columns')
+        # A repeated column is only generated once
+        selected_columns = list(dict.fromkeys(request.form.getlist('columns')))
 
         # Validate inputs
         if not (1 <= num_records <= 1000000):
@@ -127,36 +489,24 @@ def generate_and_download():
         if not selected_columns:
             return "Please select at least one column to generate.", 400
 
-        # Generate the data
-        df = generate_custom_data(num_records, selected_columns)
-
-        # Prepare the file for download based on the selected format
-        if output_format == 'csv':
-            output = io.StringIO()
-            df.to_csv(output, index=False)
-            file_data = output.getvalue()
-            mimetype = 'text/csv'
-            filename = 'custom_data.csv'
-        elif output_format == 'json':
-            file_data = to_json(df)
-            mimetype = 'application/json'
-            filename = 'custom_data.json'
-        elif output_format == 'xml':
-            file_data = to_xml(df)
-            mimetype = 'application/xml'
-            filename = 'custom_data.xml'
-        elif output_format == 'sql':
-            file_data = to_sql(df)
-            mimetype = 'application/sql'
-            filename = 'custom_data.sql'
-        else:
+        if output_format not in OUTPUT_FORMATS:
             return "Invalid format selected.", 400
 
-        # Create and return the response to trigger a file download
-        response = make_response(file_data)
-        response.headers["Content-Disposition"] = f"attachment; filename={filename}"
-        response.headers["Content-type"] = mimetype
-        return response
+        # Generate the data chunk by chunk while streaming the file for download.
+        # The first piece of the file, which holds the first chunk's rows, is
+        # generated and serialized here, before the response starts, so errors
+        # in setup, generation or serialization of that chunk still reach the
+        # 500 handler below. An error in any later chunk happens after the 200
+        # status and headers are sent: it ends the stream and the client gets
+        # a truncated file.
+        stream_format, mimetype, filename = OUTPUT_FORMATS[output_format]
+        body = stream_format(iter_custom_data(num_records, selected_columns))
+        first_piece = next(body)
+        return Response(
+            stream_with_context(prepend(first_piece, body)),
+            mimetype=mimetype,
+            headers={"Content-Disposition": f"attachment; filename={filename}"},
+        )
 
     except Exception as e:
         # Basic error handling
@@ -166,5 +516,8 @@ def generate_and_download():
 # 6. RUN THE APPLICATION
 # ------------------------------------------------------------------------------
 if __name__ == '__main__':
-    # Set debug=False when deploying to a production server.
-    app.run(debug=True)
+    # Serve with Waitress so several downloads can be handled at once; the
+    # Flask development server handles one request at a time. Under another
+    # WSGI server, point it at `app:app` instead.
+    from waitress import serve
+    serve(app, host='127.0.0.1', port=5000, threads=8)